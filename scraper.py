@@ -16,19 +16,33 @@ USAGE
   python scraper.py --out my_file.xlsx   # choose output filename
   python scraper.py --all-subjects       # slower: fetch every subject
                                          # area individually (more
-                                         # thorough but takes ~5 min)
+                                         # thorough but takes ~30 sec)
+  python scraper.py --refresh            # revalidate the 24h response cache
 """
 
+from __future__ import annotations
+
 import argparse
-import json
-import re
+import asyncio
+import bisect
+import contextlib
+import csv
+import hashlib
 import sys
 import time
-import urllib.error
-import urllib.request
+import urllib.parse
+from collections.abc import Iterator
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-import pandas as pd
+if TYPE_CHECKING:
+    # Imported for real by all_subjects_strategy, the only mode that needs it
+    import aiohttp
 
 # ---------------------------------------------------------------------------
 # API endpoints (public, no auth required — UCLA registrar website uses these)
@@ -51,13 +65,155 @@ EP_SEARCH = f"{API_BASE}/getcoursedetailbysearch"
 # in prerequisite lines, so one search term is sufficient.
 SEARCH_QUERY = "Mathematics 31A"
 
-# Regex for local post-filtering (catches rare variants like "Math. 31A")
-_PREREQ_RE = re.compile(
-    r'\b(?:Mathematics|Math\.?|MATH)\s+31A\b'
-)
+# Local post-filtering (catches rare variants like "Math. 31A").  Matches the
+# same text as the regex  \b(?:Mathematics|Math\.?|MATH)\s+31A\b  without
+# running a regex: str.find (a C-level string search) locates each "31A", and
+# only those rare hits get the boundary and subject-name checks in Python.
+_SUBJECT_NAMES = ("Mathematics", "Math", "Math.", "MATH")
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+def _find_math_31a(text: str) -> Iterator[int]:
+    """Yield the start offset of each Math 31A mention in text."""
+    n = len(text)
+    i = text.find("31A")
+    while i != -1:
+        end = i + 3
+        # Trailing word boundary: "31AL" doesn't count
+        if end == n or not _is_word_char(text[end]):
+            # At least one whitespace char between the name and "31A"
+            j = i
+            while j > 0 and text[j - 1].isspace():
+                j -= 1
+            if j < i:
+                for name in _SUBJECT_NAMES:
+                    start = j - len(name)
+                    # Leading word boundary: "BioMath 31A" doesn't count
+                    if (
+                        start >= 0
+                        and text.startswith(name, start)
+                        and (start == 0 or not _is_word_char(text[start - 1]))
+                    ):
+                        yield start
+                        break
+        i = text.find("31A", i + 1)
+
+def filter_math_31a(courses: list[dict]) -> list[dict]:
+    """
+    Return the courses whose description mentions Math 31A, in input order.
+    Scans all descriptions in one pass over a NUL-joined buffer (NUL can't
+    occur inside a match) and maps match offsets back to courses.
+    """
+    offsets: list[int] = []
+    buf: list[str] = []
+    off = 0
+    for c in courses:
+        desc = c.get("crs_desc") or ""
+        offsets.append(off)
+        buf.append(desc)
+        off += len(desc) + 1
+    joined = "\x00".join(buf)
+
+    hits = {
+        bisect.bisect_right(offsets, start) - 1
+        for start in _find_math_31a(joined)
+    }
+    return [courses[i] for i in sorted(hits)]
+
+
+# ---------------------------------------------------------------------------
+# Disk cache (raw response bodies, keyed by URL)
+# ---------------------------------------------------------------------------
+# The catalog changes slowly, so reruns within a day are served from disk.
+# Older entries are revalidated with If-None-Match / If-Modified-Since using
+# the ETag / Last-Modified headers saved alongside the body; a 304 reuses the
+# cached body.  Pass --refresh to skip the TTL and revalidate everything.
+CACHE_DIR = Path.home() / ".cache" / "ucla-scraper"
+CACHE_TTL = 24 * 60 * 60  # seconds
+USE_CACHE = True
+
+def _cache_path(url: str) -> Path:
+    return CACHE_DIR / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+
+def _meta_path(url: str) -> Path:
+    return _cache_path(url).with_suffix(".meta")
+
+def cache_get(url: str) -> bytes | None:
+    if not USE_CACHE:
+        return None
+    path = _cache_path(url)
+    try:
+        if time.time() - path.stat().st_mtime < CACHE_TTL:
+            return path.read_bytes()
+    except OSError:
+        pass
+    return None
+
+def cache_validators(url: str) -> tuple[bytes | None, dict[str, str]]:
+    """
+    Return the cached body (regardless of age) and the conditional request
+    headers to revalidate it with.  Headers are empty if there's no entry.
+    """
+    try:
+        body = _cache_path(url).read_bytes()
+    except OSError:
+        return None, {}
+    try:
+        meta = orjson.loads(_meta_path(url).read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        meta = {}
+
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return body, headers
+
+def looks_like_json_list(body: bytes) -> bool:
+    """Cheap shape check, without decoding, that body is a JSON array."""
+    stripped = body.strip()
+    return stripped.startswith(b"[") and stripped.endswith(b"]")
+
+def cache_put(
+    url: str,
+    body: bytes,
+    etag: str | None = None,
+    last_modified: str | None = None,
+) -> None:
+    # Every endpoint returns a JSON list; don't pin an error/maintenance page
+    # or an empty body on disk for a day.  Callers drop the entry with
+    # cache_delete if the body then fails to decode.
+    if not looks_like_json_list(body):
+        return
+
+    path = _cache_path(url)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so a concurrent reader never sees a partial file
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(body)
+        tmp.replace(path)
+        _meta_path(url).write_bytes(
+            orjson.dumps({"etag": etag, "last_modified": last_modified})
+        )
+    except OSError as exc:
+        print(f"  [cache] could not write {path}: {exc}", file=sys.stderr)
+
+def cache_delete(url: str) -> None:
+    for path in (_cache_path(url), _meta_path(url)):
+        try:
+            path.unlink()
+        except OSError:
+            pass
 
-def mentions_math_31a(text: str) -> bool:
-    return bool(_PREREQ_RE.search(text or ""))
+def cache_touch(url: str) -> None:
+    """Mark a revalidated (304) entry as fresh again."""
+    try:
+        _cache_path(url).touch()
+    except OSError:
+        pass
 
 
 # ---------------------------------------------------------------------------
@@ -72,24 +228,50 @@ HEADERS = {
     "Referer": "https://registrar.ucla.edu/",
 }
 
-def fetch_json(url: str, retries: int = 3, backoff: float = 2.0) -> list | dict:
-    for attempt in range(retries):
-        try:
-            req = urllib.request.Request(url, headers=HEADERS)
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                return json.loads(resp.read())
-        except urllib.error.HTTPError as exc:
-            print(f"  [HTTP {exc.code}] {url}", file=sys.stderr)
-            if exc.code in (429, 503):
-                time.sleep(backoff * (attempt + 1))
-                continue
-            raise
-        except Exception as exc:
-            if attempt < retries - 1:
-                time.sleep(backoff)
-                continue
-            raise
-    return []
+# One shared session so connections to api.ucla.edu are reused (keep-alive)
+# instead of paying a fresh TCP+TLS handshake on every request.  The adapter
+# retries 429/503 responses and connection errors with exponential backoff;
+# once retries run out the last response is returned so fetch_json can report
+# its status like any other HTTP error.
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=2,
+        status_forcelist=[429, 503],
+        raise_on_status=False,
+    ),
+))
+
+def _decode(url: str, body: bytes) -> list | dict:
+    """orjson.loads, evicting the cache entry for url if the body is invalid."""
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError:
+        cache_delete(url)
+        raise
+
+def fetch_json(url: str) -> list | dict:
+    body = cache_get(url)
+    if body is None:
+        stale, conditional = cache_validators(url)
+        r = SESSION.get(url, headers=conditional, timeout=30)
+        if r.status_code == 304 and stale is not None:
+            cache_touch(url)
+            body = stale
+        else:
+            if not r.ok:
+                print(f"  [HTTP {r.status_code}] {url}", file=sys.stderr)
+            r.raise_for_status()
+            body = r.content
+            cache_put(
+                url, body,
+                r.headers.get("ETag"), r.headers.get("Last-Modified"),
+            )
+    return _decode(url, body)
 
 
 # ---------------------------------------------------------------------------
@@ -107,121 +289,239 @@ def search_strategy() -> list[dict]:
     if not isinstance(results, list):
         print("  Unexpected response format.", file=sys.stderr)
         return []
-    return results
+
+    # Post-filter: the search is fuzzy, make sure the description really
+    # mentions Math 31A
+    hits = filter_math_31a(results)
+    print(f"  {len(results)} result(s), {len(hits)} mention Math 31A")
+    return hits
 
 
 # ---------------------------------------------------------------------------
-# Strategy B — per-subject fetch (slow, ~5 min, more thorough)
+# Strategy B — per-subject fetch (async, more thorough)
 # ---------------------------------------------------------------------------
-def all_subjects_strategy() -> list[dict]:
+# All subject-area requests are multiplexed over a small pool of keep-alive
+# connections by one event loop; the semaphore caps how many are in flight.
+MAX_CONCURRENCY = 16
+
+
+async def fetch_raw_async(
+    session: aiohttp.ClientSession,
+    url: str,
+    retries: int = 3,
+    backoff: float = 2.0,
+    sem: asyncio.Semaphore | None = None,
+) -> bytes:
     """
-    Fetch every subject area individually and filter locally.
-    Slower but guarantees we see every course description in the catalog.
+    GET url and return the raw body, retrying 429/503, connection errors and
+    timeouts.  If given, sem is held only while a request is in flight, never
+    during a backoff sleep.
     """
-    subjects = fetch_json(EP_ALL_SUBJECTS)
-    if not isinstance(subjects, list):
-        print("Failed to load subject areas.", file=sys.stderr)
-        return []
+    body = cache_get(url)
+    if body is not None:
+        return body
+    stale, conditional = cache_validators(url)
 
-    print(f"  Found {len(subjects)} subject areas.")
-    matching: list[dict] = []
-
-    for i, subj in enumerate(subjects, start=1):
-        code = subj.get("subj_area_cd", "").strip()
-        name = subj.get("display_value", "").strip()
-        print(f"  [{i:3d}/{len(subjects)}] {code:<12} {name}", end="")
-
-        url = f"{EP_BY_SUBJECT}?subjectarea={urllib.parse.quote(code)}"
+    for attempt in range(retries):
+        delay = 0.0
         try:
-            courses = fetch_json(url)
-        except Exception as exc:
-            print(f"  ERROR: {exc}")
+            async with sem or contextlib.nullcontext():
+                async with session.get(url, headers=conditional) as r:
+                    if r.status == 304 and stale is not None:
+                        cache_touch(url)
+                        return stale
+                    if r.status in (429, 503) and attempt < retries - 1:
+                        print(f"  [HTTP {r.status}] {url}", file=sys.stderr)
+                        delay = backoff * (attempt + 1)
+                    else:
+                        if r.status >= 400:
+                            print(f"  [HTTP {r.status}] {url}", file=sys.stderr)
+                        r.raise_for_status()
+                        body = await r.read()
+                        etag = r.headers.get("ETag")
+                        last_modified = r.headers.get("Last-Modified")
+        except aiohttp.ClientResponseError:
+            raise  # HTTP error status, already reported above
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == retries - 1:
+                raise
+            delay = backoff
+
+        if delay:
+            # Back off with the connection and semaphore slot released
+            await asyncio.sleep(delay)
             continue
+        cache_put(url, body, etag, last_modified)
+        return body
+
+
+async def fetch_json_async(session: aiohttp.ClientSession, url: str) -> list | dict:
+    return _decode(url, await fetch_raw_async(session, url))
+
 
-        hits = [c for c in courses if mentions_math_31a(c.get("crs_desc", ""))]
-        print(f"  → {len(hits)} match(es)" if hits else "")
-        matching.extend(hits)
-        time.sleep(0.3)  # polite delay
+async def all_subjects_strategy() -> list[dict]:
+    """
+    Fetch every subject area individually and filter locally.
+    Slower but guarantees we see every course description in the catalog.
+    Requests are issued concurrently from a single asyncio event loop.
+    """
+    # Only this mode needs aiohttp; keep it off the startup path.  Bind it
+    # module-wide so fetch_raw_async can name its exception types.
+    global aiohttp
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(
+        limit=MAX_CONCURRENCY, limit_per_host=MAX_CONCURRENCY
+    )
+    timeout = aiohttp.ClientTimeout(total=30)
+    async with aiohttp.ClientSession(
+        headers=HEADERS, connector=connector, timeout=timeout
+    ) as session:
+        subjects = await fetch_json_async(session, EP_ALL_SUBJECTS)
+        if not isinstance(subjects, list):
+            print("Failed to load subject areas.", file=sys.stderr)
+            return []
+
+        print(f"  Found {len(subjects)} subject areas.")
+        # Build every (code, name, url) up front, then fan out the requests
+        targets = []
+        for subj in subjects:
+            code = subj.get("subj_area_cd", "").strip()
+            name = subj.get("display_value", "").strip()
+            url = f"{EP_BY_SUBJECT}?subjectarea={urllib.parse.quote(code)}"
+            targets.append((code, name, url))
+
+        sem = asyncio.Semaphore(MAX_CONCURRENCY)
+
+        # Each subject is filtered as soon as its response arrives, while the
+        # other requests are still in flight, and reported in completion order.
+        async def fetch_subject(
+            code: str, name: str, url: str
+        ) -> tuple[str, str, list[dict] | Exception]:
+            try:
+                body = await fetch_raw_async(session, url, sem=sem)
+                # Check the shape first so error objects and HTML pages are
+                # reported rather than counted as "no matches".
+                if not looks_like_json_list(body):
+                    raise ValueError("Unexpected response format.")
+                # Most subject areas never mention "31A"; skip decoding them.
+                courses = _decode(url, body) if b"31A" in body else []
+                if not isinstance(courses, list):
+                    raise ValueError("Unexpected response format.")
+                return code, name, filter_math_31a(courses)
+            except Exception as exc:
+                return code, name, exc
+
+        matching: list[dict] = []
+        pending = [fetch_subject(*t) for t in targets]
+        for i, next_done in enumerate(asyncio.as_completed(pending), start=1):
+            code, name, hits = await next_done
+            print(f"  [{i:3d}/{len(targets)}] {code:<12} {name}", end="")
+
+            if isinstance(hits, Exception):
+                print(f"  ERROR: {hits}")
+                continue
+
+            print(f"  → {len(hits)} match(es)" if hits else "")
+            matching.extend(hits)
 
     return matching
 
 
 # ---------------------------------------------------------------------------
-# Normalise raw API records into clean rows
+# Normalise raw API records into clean columns
 # ---------------------------------------------------------------------------
-def normalise(courses: list[dict]) -> list[dict]:
+# Output column order
+COLUMNS = ("subject_area", "course_name", "units", "level", "description")
+
+def normalise(courses: list[dict]) -> dict[str, list[str]]:
     """
-    Convert raw API dicts to clean output rows, keeping only relevant columns.
-    Columns returned:
+    Convert raw API dicts to clean output columns, keeping only relevant fields.
+    Returns one list per column (all the same length), keyed by:
       subject_area  — e.g. "Chemistry (CHEM)"
       course_name   — e.g. "20A. Chemical Structure"
       units         — e.g. "4.0" or "2.0 to 4.0"
       level         — e.g. "Lower Division Courses"
       description   — full description text
     """
-    rows = []
-    seen: set[str] = set()  # deduplicate
+    cols: dict[str, list[str]] = {c: [] for c in COLUMNS}
+    subject_area, course_name, units, level, description = cols.values()
+    seen: set[tuple[str, str]] = set()  # first occurrence of each course wins
+
+    # Bind everything the loop touches to locals (LOAD_FAST instead of
+    # global/attribute lookups on every course).
+    _get, _strip, _intern = dict.get, str.strip, sys.intern
+    _seen_add = seen.add
+    _add_subject, _add_course = subject_area.append, course_name.append
+    _add_units, _add_level = units.append, level.append
+    _add_desc = description.append
 
     for c in courses:
-        key = (
-            c.get("subj_area_cd", "").strip(),
-            c.get("course_title", "").strip(),
-        )
+        title = _strip(_get(c, "course_title") or "")
+        # Subject codes repeat across many courses; interning them lets set
+        # lookups compare equal codes by identity.
+        key = (_intern(_strip(_get(c, "subj_area_cd") or "")), title)
         if key in seen:
             continue
-        seen.add(key)
 
-        # Post-filter: make sure the description really mentions Math 31A
-        desc = (c.get("crs_desc") or "").strip()
-        if not mentions_math_31a(desc):
+        # Both strategies already ran filter_math_31a; this is just a cheap
+        # sanity check.
+        desc = _strip(_get(c, "crs_desc") or "")
+        if "31A" not in desc:
             continue
+        _seen_add(key)
 
-        rows.append({
-            "subject_area":  (c.get("subj_area_nm") or "").strip(),
-            "course_name":   (c.get("course_title") or "").strip(),
-            "units":         str(c.get("unt_rng") or "").strip(),
-            "level":         (c.get("crs_career_lvl_nm") or "").strip(),
-            "description":   desc,
-        })
+        # Likewise for subject names in the sort below.
+        _add_subject(_intern(_strip(_get(c, "subj_area_nm") or "")))
+        _add_course(title)
+        _add_units(_strip(str(_get(c, "unt_rng") or "")))
+        _add_level(_strip(_get(c, "crs_career_lvl_nm") or ""))
+        _add_desc(desc)
 
     # Sort by subject area then course name for easy reading
-    rows.sort(key=lambda r: (r["subject_area"], r["course_name"]))
-    return rows
+    order = sorted(
+        range(len(subject_area)),
+        key=lambda i: (subject_area[i], course_name[i]),
+    )
+    return {name: [col[i] for i in order] for name, col in cols.items()}
 
 
 # ---------------------------------------------------------------------------
 # Export
 # ---------------------------------------------------------------------------
-def export_excel(rows: list[dict], path: Path) -> None:
-    df = pd.DataFrame(rows, columns=[
-        "subject_area", "course_name", "units", "level", "description"
-    ])
+def export_excel(cols: dict[str, list[str]], path: Path) -> None:
+    # pandas is slow to import; only pay for it when actually exporting
+    import pandas as pd
+
+    # Every column is text: declare it up front instead of letting pandas infer
+    # object dtype, and keep the strings in contiguous Arrow buffers.
+    df = pd.DataFrame(cols, columns=COLUMNS, dtype="string[pyarrow]")
 
-    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+    with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
         df.to_excel(writer, index=False, sheet_name="Math 31A Prereq Courses")
         ws = writer.sheets["Math 31A Prereq Courses"]
 
-        # Auto-size columns (rough heuristic)
-        col_widths = {"A": 35, "B": 45, "C": 8, "D": 28, "E": 90}
-        for col_letter, width in col_widths.items():
-            ws.column_dimensions[col_letter].width = width
-
-        # Wrap text in description column
-        from openpyxl.styles import Alignment
-        for cell in ws["E"][1:]:
-            cell.alignment = Alignment(wrap_text=True, vertical="top")
+        # Auto-size columns (rough heuristic); the description column also
+        # gets a wrap format, applied once for the whole column.
+        wrap = writer.book.add_format({"text_wrap": True, "valign": "top"})
+        ws.set_column("A:A", 35)
+        ws.set_column("B:B", 45)
+        ws.set_column("C:C", 8)
+        ws.set_column("D:D", 28)
+        ws.set_column("E:E", 90, wrap)
 
         # Freeze the header row
-        ws.freeze_panes = "A2"
+        ws.freeze_panes(1, 0)
 
     print(f"  Saved {len(df)} courses → {path}")
 
 
-def export_csv(rows: list[dict], path: Path) -> None:
-    df = pd.DataFrame(rows, columns=[
-        "subject_area", "course_name", "units", "level", "description"
-    ])
-    df.to_csv(path, index=False)
+def export_csv(cols: dict[str, list[str]], path: Path) -> None:
+    # Columns are already plain strings; no DataFrame needed.
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(COLUMNS)
+        writer.writerows(zip(*(cols[c] for c in COLUMNS)))
     print(f"  Saved CSV → {path}")
 
 
@@ -243,12 +543,20 @@ def main() -> None:
     parser.add_argument(
         "--all-subjects", dest="all_subjects", action="store_true",
         help=(
-            "Fetch every subject area individually (slower, ~5 min) "
+            "Fetch every subject area individually (slower, ~30 sec) "
             "instead of using the search endpoint."
         )
     )
+    parser.add_argument(
+        "--refresh", action="store_true",
+        help="Revalidate every cached API response instead of trusting it for 24h."
+    )
     args = parser.parse_args()
 
+    if args.refresh:
+        global USE_CACHE
+        USE_CACHE = False
+
     print("UCLA Course Catalog Scraper")
     print("===========================")
     print(f"Looking for courses that list '{SEARCH_QUERY}' as a prerequisite.\n")
@@ -256,8 +564,7 @@ def main() -> None:
     # --- Fetch ---
     if args.all_subjects:
         print("Mode: Fetching all subject areas individually (slow but thorough)...")
-        import urllib.parse  # needed in all_subjects_strategy
-        raw = all_subjects_strategy()
+        raw = asyncio.run(all_subjects_strategy())
     else:
         print("Mode: Search API (fast — takes ~5 seconds) ...")
         raw = search_strategy()
@@ -266,13 +573,14 @@ def main() -> None:
         print("\nNo courses returned. Check your internet connection.")
         sys.exit(1)
 
-    print(f"\n  Raw results from API: {len(raw)} courses")
+    print(f"\n  Courses mentioning Math 31A: {len(raw)}")
 
     # --- Normalise & deduplicate ---
-    rows = normalise(raw)
-    print(f"  After dedup + filtering: {len(rows)} courses\n")
+    cols = normalise(raw)
+    n = len(cols["subject_area"])
+    print(f"  After dedup: {n} courses\n")
 
-    if not rows:
+    if not n:
         print("No courses matched after filtering. Unexpected — please report.")
         sys.exit(1)
 
@@ -280,19 +588,22 @@ def main() -> None:
     print("Preview (first 10 matches):")
     print(f"  {'Subject Area':<35} {'Course':<40} {'Units'}")
     print(f"  {'-'*35} {'-'*40} {'-'*5}")
-    for r in rows[:10]:
-        print(f"  {r['subject_area']:<35} {r['course_name']:<40} {r['units']}")
-    if len(rows) > 10:
-        print(f"  ... and {len(rows) - 10} more.\n")
+    for i in range(min(n, 10)):
+        print(
+            f"  {cols['subject_area'][i]:<35} {cols['course_name'][i]:<40} "
+            f"{cols['units'][i]}"
+        )
+    if n > 10:
+        print(f"  ... and {n - 10} more.\n")
 
     # --- Export ---
     out_path = Path(args.out)
     print(f"\nExporting ...")
-    export_excel(rows, out_path)
+    export_excel(cols, out_path)
 
     if args.csv:
         csv_path = out_path.with_suffix(".csv")
-        export_csv(rows, csv_path)
+        export_csv(cols, csv_path)
 
     print("\nDone!")
 
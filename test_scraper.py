@@ -0,0 +1,86 @@
+"""
+Equivalence check for the Math 31A filter.
+
+The catalog filter is defined by the regex below; scraper._find_math_31a is a
+hand-written matcher that must accept exactly the same descriptions.
+
+Run with:  python -m pytest test_scraper.py
+"""
+
+import random
+import re
+
+import scraper
+
+# What "mentions Math 31A" means
+REFERENCE_RE = re.compile(r'\b(?:Mathematics|Math\.?|MATH)\s+31A\b')
+
+
+def reference_filter(courses: list[dict]) -> list[dict]:
+    return [c for c in courses if REFERENCE_RE.search(c.get("crs_desc") or "")]
+
+
+EDGE_CASES = [
+    "Requisites: Mathematics 31A, 31B, and Physics 1A.",
+    "Requisites: courses 81, 115, Mathematics 31A, 31B.",
+    "Math 31A",
+    "Math. 31A",
+    "MATH 31A",
+    "Mathematics  31A",         # several spaces
+    "Mathematics\n31A",         # newline
+    "Mathematics\t31A.",
+    "Math 31AL",                # different course
+    "Math 31A_",
+    "BioMath 31A",              # no leading word boundary
+    "_Math 31A",
+    "Mathematics31A",           # no whitespace
+    "MATHEMATICS 31A",          # not a catalog spelling
+    "math 31A",
+    "Program in Computing 31A",
+    "Mathematics 31B",
+    "31A",
+    " 31A",
+    "Math 31A Math 31AL",
+    "Math 31AL, Mathematics 31A",
+    "Math\x0031A",              # NUL is not whitespace
+    "Math \x00 31A",
+    "",
+    None,
+]
+
+
+def test_edge_cases_match_reference():
+    for text in EDGE_CASES:
+        courses = [{"crs_desc": text}]
+        assert scraper.filter_math_31a(courses) == reference_filter(courses), text
+
+
+def test_matches_never_span_nul_separated_descriptions():
+    # filter_math_31a joins descriptions with NUL; a name at the end of one
+    # course and "31A" at the start of the next must not combine.
+    courses = [
+        {"crs_desc": "Mathematics"},
+        {"crs_desc": " 31A"},
+        {"crs_desc": "Math "},
+        {"crs_desc": "31A"},
+        {"crs_desc": "Math. 31A"},
+    ]
+    assert scraper.filter_math_31a(courses) == [courses[4]]
+
+
+def test_fuzz_matches_reference():
+    tokens = [
+        "Math", "Mathematics", "MATH", "Math.", "Bio", "ematics", "31A",
+        "31AL", "31A_", "3", "1A", "_", "x", "é", " ", "  ", "\n", "\t",
+        ".", ",", "\x00",
+    ]
+    rng = random.Random(0)
+    for _ in range(20000):
+        text = "".join(rng.choice(tokens) for _ in range(rng.randint(0, 8)))
+        courses = [
+            {"crs_desc": text},
+            {"crs_desc": None},
+            {"crs_desc": text[::-1]},
+            {"crs_desc": text + text},
+        ]
+        assert scraper.filter_math_31a(courses) == reference_filter(courses), text